@@ -16,13 +16,21 @@ SODRÉ SANTORO - SCRAPER FINAL
 """
 
 import asyncio
+import hashlib
 import sys
 import json
+import re
 import time
+import unicodedata
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -35,14 +43,207 @@ except:
         SupabaseClient = None
 
 
+# 🔥 Palavras-chave do fallback de categorização (ordem = prioridade)
+# Definidas uma única vez no módulo em vez de recriadas a cada lote
+CATEGORY_KEYWORDS = (
+    ('Imóveis', (
+        'imov', 'imovel', 'apartamento', 'casa', 'terreno', 'galpão', 'galpao',
+        'gleba', 'lote', 'edifica', 'residencial', 'nua-propriedade',
+    )),
+    ('Veículos', (
+        'carro', 'moto', 'caminhão', 'caminhao', 'onibus', 'ônibus',
+        'embarca', 'veiculo', 'veículo', 'van', 'perua', 'utilit', 'bicicleta',
+    )),
+    ('Máquinas & Equipamentos', (
+        'trator', 'empilhadeira', 'gerador', 'compressor', 'implemento',
+        'terraplenagem', 'agrícola', 'agricola', 'industrial',
+    )),
+    ('Tecnologia', (
+        'informática', 'informatica', 'eletron', 'eletric', 'áudio', 'audio',
+        'vídeo', 'video', 'iluminação', 'iluminacao', 'tech', 'celular',
+    )),
+    ('Casa & Consumo', (
+        'móvel', 'movel', 'eletrodomest', 'lazer', 'esporte', 'escola',
+        'escritório', 'escritorio', 'decoração', 'decoracao', 'uso pessoal',
+    )),
+    ('Industrial & Empresarial', (
+        'academia', 'esquadria', 'ferramenta', 'hospitalar', 'comercial',
+        'cozinha industrial', 'estoque',
+    )),
+    ('Materiais & Sucatas', (
+        'diversos', 'sucata', 'material', 'resíduo', 'residuo', 'bruto', 'lote',
+    )),
+    ('Arte & Colecionáveis', (
+        'instrumento', 'arte', 'relógio', 'relogio', 'bolsa', 'joia',
+        'caneta', 'colecion', 'antiguidade',
+    )),
+    ('Animais', (
+        'animal', 'gado', 'cavalo', 'boi', 'vaca', 'pet',
+    )),
+)
+
+
+def _fold_text(text: str) -> str:
+    """Canonicaliza texto para lookup: minúsculas, sem acentos, sem espaços nas pontas"""
+    folded = unicodedata.normalize('NFKD', text.casefold())
+    return folded.encode('ascii', 'ignore').decode('ascii').strip()
+
+
+def _lot_key(lot_id):
+    """Chave de deduplicação: int quando numérico (hash barato, e '123' == 123)"""
+    if type(lot_id) is int:
+        return lot_id
+    try:
+        return int(lot_id)
+    except (TypeError, ValueError):
+        return lot_id
+
+
+def _json_loads(raw: bytes):
+    """Decodifica o corpo da resposta da API; usa orjson quando instalado"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _build_keyword_matcher():
+    """
+    Compila CATEGORY_KEYWORDS em uma única regex de varredura
+    
+    Lookahead em cada posição + alternativas ordenadas por prioridade:
+    uma passada em C substitui dezenas de testes `in` por lote.
+    """
+    keyword_rank = {}
+    for rank, (category, keywords) in enumerate(CATEGORY_KEYWORDS):
+        for keyword in keywords:
+            keyword_rank.setdefault(_fold_text(keyword), (rank, category))
+    
+    ordered = sorted(keyword_rank, key=lambda kw: keyword_rank[kw][0])
+    pattern = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in ordered) + '))')
+    return keyword_rank, pattern
+
+
+KEYWORD_CATEGORY, CATEGORY_KEYWORD_RE = _build_keyword_matcher()
+
+# 🔥 Textos mais curtos que a menor palavra-chave nunca casam: pula a regex
+KEYWORD_MIN_LEN = min(map(len, KEYWORD_CATEGORY))
+
+# 🔥 Campos do lote copiados 1:1 para o schema de sodre_items, por tipo
+LOT_STR_FIELDS = (
+    # IDs e identificadores
+    'lot_number', 'lot_inspection_number',
+    # Categorias e segmentos
+    'segment_id', 'segment_label', 'segment_slug', 'lot_category',
+    # Localização
+    'lot_location', 'city', 'state',
+    # Leilão, leiloeiro e cliente
+    'auction_name', 'auction_status', 'auctioneer_name', 'client_name',
+    # Lances
+    'bid_user_nickname',
+    # Veículos
+    'lot_brand', 'lot_model', 'lot_plate', 'lot_color', 'lot_fuel',
+    'lot_transmission', 'lot_sinister', 'lot_origin', 'lot_tags',
+    # Status
+    'lot_status',
+    # Campos judiciais (imóveis)
+    'lot_judicial_process', 'lot_judicial_action', 'lot_judicial_executor',
+    'lot_judicial_executed', 'lot_judicial_judge',
+    # Imóveis - endereço
+    'lot_neighborhood', 'lot_street',
+    # Materiais
+    'lot_type_name',
+)
+LOT_INT_FIELDS = (
+    'lot_inspection_id', 'client_id', 'lot_year_manufacture', 'lot_year_model',
+    'lot_km', 'lot_status_id', 'lot_dormitories', 'lot_suites',
+)
+LOT_NUMERIC_FIELDS = (
+    'tj_praca_value', 'tj_praca_discount', 'lot_useful_area', 'lot_total_area',
+)
+LOT_BOOL_FIELDS = (
+    'bid_has_bid', 'lot_is_judicial', 'lot_is_scrap', 'is_highlight', 'lot_test',
+)
+
+# Campos extras do lote preservados em metadata
+METADATA_EXTRA_FIELDS = ('segment_base', 'search_terms')
+
+# Status que indicam leilão/lote encerrado (frozenset: lookup O(1))
+CLOSED_AUCTION_STATUSES = frozenset({'encerrado', '3', 'closed', 'finalizado', 'finished'})
+CLOSED_LOT_STATUSES = frozenset({'encerrado', 'finalizado', 'vendido', 'sold', 'closed'})
+
+
+# 🔥 Flags para um Chromium headless mais leve (sem GPU, extensões e tráfego de fundo)
+CHROMIUM_ARGS = (
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+)
+
+# 🔥 Recursos que o scraper nunca lê (só precisa do JSON de /api/search-lots)
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'stylesheet', 'media'})
+
+# 🔥 Analytics/rastreadores: scripts e beacons que só consomem banda e CPU
+BLOCKED_HOSTS_RE = re.compile(
+    r'google-analytics\.com|googletagmanager\.com|doubleclick\.net|'
+    r'facebook\.(?:com|net)|hotjar\.com|clarity\.ms'
+)
+
+
+async def _block_heavy_resources(route):
+    """Route handler: aborta imagens/fontes/CSS/mídia e analytics, deixa o resto passar"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS_RE.search(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# Botão "Avançar" habilitado (seletor principal da paginação)
+NEXT_BUTTON_SELECTOR = 'button[title="Avançar"]:not([disabled])'
+
+# 🔥 Paginação: rola até o rodapé, testa os seletores recebidos (SodreScraperFinal.NEXT_SELECTORS)
+# e clica no primeiro visível/habilitado (1 round-trip CDP por página)
+NEXT_PAGE_JS = r'''
+(selectors) => {
+    window.scrollTo(0, document.body.scrollHeight);
+    const candidates = [];
+    for (const selector of selectors) {
+        candidates.push(...document.querySelectorAll(selector));
+    }
+    for (const button of document.querySelectorAll('button')) {
+        if ((button.textContent || '').includes('Avançar')) candidates.push(button);
+    }
+    for (const button of candidates) {
+        if (!button.disabled && button.offsetParent !== null) {
+            button.click();
+            return true;
+        }
+    }
+    return false;
+}
+'''
+
+
 class SodreScraperFinal:
     """Scraper Sodré - Versão Final com 10 Categorias Refinadas"""
     
+    # Seletores CSS do botão "Avançar" (compartilhados por todas as seções)
+    NEXT_SELECTORS = (
+        'button[title="Avançar"]',
+        'button.i-mdi\\:chevron-right',
+        '.pagination button:last-child',
+    )
+    
     def __init__(self, debug=False):
         self.source = 'sodre'
         self.base_url = 'https://www.sodresantoro.com.br'
         self.debug = debug
         
+        # ✅ Prefixos do link de fallback (montados uma vez, não por lote)
+        self.auction_url_prefix = 'https://leilao.sodresantoro.com.br/leilao/'
+        self.lot_url_prefix = f"{self.base_url}/lote/"
+        
         # ✅ Configuração otimizada por seção
         self.section_config = {
             'veiculos': {'wait_time': 7, 'max_retries': 3, 'max_pages': 200},
@@ -167,279 +368,120 @@ class SodreScraperFinal:
             # ========================================
             'unknown': 'Outros',
         }
+        
+        # ✅ Chaves pré-normalizadas (sem acento/caixa) para lookup direto
+        self.category_lookup = {
+            _fold_text(key): category for key, category in self.category_mapping.items()
+        }
+        self.category_cache = {}  # subcategoria original → categoria refinada
     
     def _categorize_item(self, subcategory: str) -> str:
         """
         Mapeia subcategoria original para uma das 10 categorias refinadas
         
         Prioridade:
-        1. Mapeamento direto (case-insensitive)
+        1. Mapeamento direto (case/acento-insensitive)
         2. Detecção por palavras-chave
         3. Fallback: 'Outros'
         """
         if not subcategory:
             return 'Outros'
         
-        # Normaliza
-        subcategory_clean = subcategory.lower().strip()
+        # ✅ Memoizado: poucas dezenas de subcategorias distintas por execução
+        category = self.category_cache.get(subcategory)
+        if category is None:
+            category = self._resolve_category(subcategory)
+            self.category_cache[subcategory] = category
+        return category
+    
+    def _resolve_category(self, subcategory: str) -> str:
+        """Resolve categoria sem cache (mapeamento direto → palavras-chave → 'Outros')"""
+        # Normaliza (caixa + acentos), mesma forma das chaves pré-computadas
+        subcategory_clean = _fold_text(subcategory)
         
         # Busca no mapeamento direto
-        category = self.category_mapping.get(subcategory_clean)
+        category = self.category_lookup.get(subcategory_clean)
         if category:
             return category
         
-        # Fallback: Detecção por palavras-chave
-        # IMÓVEIS
-        if any(word in subcategory_clean for word in [
-            'imov', 'imovel', 'apartamento', 'casa', 'terreno', 'galpão', 'galpao',
-            'gleba', 'lote', 'edifica', 'residencial', 'nua-propriedade'
-        ]):
-            return 'Imóveis'
-        
-        # VEÍCULOS
-        if any(word in subcategory_clean for word in [
-            'carro', 'moto', 'caminhão', 'caminhao', 'onibus', 'ônibus',
-            'embarca', 'veiculo', 'veículo', 'van', 'perua', 'utilit', 'bicicleta'
-        ]):
-            return 'Veículos'
-        
-        # MÁQUINAS & EQUIPAMENTOS
-        if any(word in subcategory_clean for word in [
-            'trator', 'empilhadeira', 'gerador', 'compressor', 'implemento',
-            'terraplenagem', 'agrícola', 'agricola', 'industrial'
-        ]):
-            return 'Máquinas & Equipamentos'
-        
-        # TECNOLOGIA
-        if any(word in subcategory_clean for word in [
-            'informática', 'informatica', 'eletron', 'eletric', 'áudio', 'audio',
-            'vídeo', 'video', 'iluminação', 'iluminacao', 'tech', 'celular'
-        ]):
-            return 'Tecnologia'
-        
-        # CASA & CONSUMO
-        if any(word in subcategory_clean for word in [
-            'móvel', 'movel', 'eletrodomest', 'lazer', 'esporte', 'escola',
-            'escritório', 'escritorio', 'decoração', 'decoracao', 'uso pessoal'
-        ]):
-            return 'Casa & Consumo'
-        
-        # INDUSTRIAL & EMPRESARIAL
-        if any(word in subcategory_clean for word in [
-            'academia', 'esquadria', 'ferramenta', 'hospitalar', 'comercial',
-            'cozinha industrial', 'estoque'
-        ]):
-            return 'Industrial & Empresarial'
-        
-        # MATERIAIS & SUCATAS
-        if any(word in subcategory_clean for word in [
-            'diversos', 'sucata', 'material', 'resíduo', 'residuo', 'bruto', 'lote'
-        ]):
-            return 'Materiais & Sucatas'
-        
-        # ARTE & COLECIONÁVEIS
-        if any(word in subcategory_clean for word in [
-            'instrumento', 'arte', 'relógio', 'relogio', 'bolsa', 'joia',
-            'caneta', 'colecion', 'antiguidade'
-        ]):
-            return 'Arte & Colecionáveis'
-        
-        # ANIMAIS
-        if any(word in subcategory_clean for word in [
-            'animal', 'gado', 'cavalo', 'boi', 'vaca', 'pet'
-        ]):
-            return 'Animais'
-        
-        return 'Outros'
+        if len(subcategory_clean) < KEYWORD_MIN_LEN:
+            return 'Outros'
+        
+        # Fallback: Detecção por palavras-chave (menor rank = maior prioridade)
+        best = None
+        for match in CATEGORY_KEYWORD_RE.finditer(subcategory_clean):
+            rank, category = KEYWORD_CATEGORY[match.group(1)]
+            if best is None or rank < best[0]:
+                best = (rank, category)
+                if rank == 0:
+                    break
+        
+        return best[1] if best else 'Outros'
     
-    async def scrape(self) -> List[Dict]:
-        """Scrape completo com interceptação passiva"""
+    async def scrape(self, browser=None) -> List[Dict]:
+        """
+        Scrape completo com interceptação passiva
+        
+        `browser` opcional: reusa um Chromium já aberto pelo chamador
+        (não é fechado aqui); sem ele, lança e fecha um próprio.
+        """
         print("\n" + "="*60)
         print("🟣 SODRÉ SANTORO - VERSÃO FINAL")
         print("="*60)
         
-        all_lots = []
-        seen_lot_ids = set()  # ✅ Deduplicação na coleta
+        seen_lot_ids = set()  # ✅ Deduplicação na coleta (ids int, compartilhada entre seções)
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                locale='pt-BR'
-            )
-            
-            page = await context.new_page()
-            
-            current_section = {'name': None, 'api_calls': 0, 'last_capture': 0}
-            
-            async def intercept_response(response):
-                try:
-                    if '/api/search-lots' in response.url and response.status == 200:
-                        current_section['api_calls'] += 1
-                        
-                        data = await response.json()
-                        per_page = data.get('perPage', 0)
-                        
-                        if per_page > 0:
-                            results = data.get('results', [])
-                            hits = data.get('hits', {}).get('hits', [])
-                            
-                            lots_captured = 0
-                            new_lots = 0
-                            
-                            # Extrai lotes da resposta
-                            lots_to_add = []
-                            if results:
-                                lots_to_add = results
-                            elif hits:
-                                lots_to_add = [hit.get('_source', hit) for hit in hits]
-                            
-                            # ✅ Deduplica durante a coleta
-                            for lot in lots_to_add:
-                                lot_id = lot.get('id') or lot.get('lot_id')
-                                if lot_id and lot_id not in seen_lot_ids:
-                                    seen_lot_ids.add(lot_id)
-                                    all_lots.append(lot)
-                                    new_lots += 1
-                            
-                            if new_lots > 0:
-                                current_section['last_capture'] = time.time()
-                                section = current_section['name']
-                                if section not in self.section_counters:
-                                    self.section_counters[section] = 0
-                                self.section_counters[section] += new_lots
-                                
-                                print(f"     📥 API call #{current_section['api_calls']}: +{new_lots} lotes únicos | Total: {self.section_counters[section]}")
-                            else:
-                                if self.debug:
-                                    total = len(lots_to_add)
-                                    print(f"     ⚪ API call #{current_section['api_calls']}: 0 novos ({total} duplicatas)")
-                except:
-                    pass
-            
-            page.on('response', intercept_response)
-            
-            for url in self.urls:
-                section_name = url.split('/')[3]
-                current_section['name'] = section_name
-                current_section['api_calls'] = 0
-                current_section['last_capture'] = 0
-                
-                config = self.section_config.get(section_name, {'wait_time': 7, 'max_retries': 3, 'max_pages': 200})
-                
-                lots_before = len(all_lots)
-                
-                print(f"\n📦 {section_name.upper()}")
-                print(f"  ⏱️ Tempo de espera: {config['wait_time']}s | Máx páginas: {config['max_pages']}")
-                
+        if browser is not None:
+            section_results = await self._scrape_sections(browser, seen_lot_ids)
+        else:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True, args=list(CHROMIUM_ARGS))
                 try:
-                    await page.goto(url, wait_until="networkidle", timeout=60000)
-                    
-                    print(f"  ⏳ Aguardando carregamento inicial...")
-                    
-                    # ✅ Espera inicial adaptativa
-                    for attempt in range(config['max_retries']):
-                        await asyncio.sleep(config['wait_time'])
-                        
-                        lots_after = len(all_lots)
-                        new_lots = lots_after - lots_before
-                        
-                        if new_lots > 0:
-                            print(f"  ✅ Tentativa {attempt + 1}: {new_lots} lotes capturados")
-                            break
-                        else:
-                            if attempt < config['max_retries'] - 1:
-                                print(f"  🔄 Tentativa {attempt + 1}: Aguardando mais dados...")
-                            else:
-                                print(f"  ⚠️ Tentativa {attempt + 1}: Nenhum dado capturado")
-                    
-                    # ✅ PAGINAÇÃO ROBUSTA
-                    if len(all_lots) > lots_before:
-                        failed_clicks = 0
-                        max_failed_clicks = 5
-                        
-                        for page_num in range(2, config['max_pages'] + 1):
-                            try:
-                                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                                await asyncio.sleep(1)
-                                
-                                selectors = [
-                                    'button[title="Avançar"]:not([disabled])',
-                                    'button[title="Avançar"]',
-                                    'button:has-text("Avançar"):not([disabled])',
-                                    'button.i-mdi\\:chevron-right:not([disabled])',
-                                    '.pagination button:last-child:not([disabled])',
-                                ]
-                                
-                                button_found = False
-                                for selector in selectors:
-                                    try:
-                                        button = page.locator(selector).first
-                                        count = await button.count()
-                                        
-                                        if count > 0:
-                                            is_visible = await button.is_visible()
-                                            is_enabled = await button.is_enabled()
-                                            
-                                            if is_visible and is_enabled:
-                                                await button.click()
-                                                button_found = True
-                                                failed_clicks = 0
-                                                break
-                                    except:
-                                        continue
-                                
-                                if not button_found:
-                                    failed_clicks += 1
-                                    if self.debug:
-                                        print(f"    ⚠️ Botão não encontrado (tentativa {failed_clicks}/{max_failed_clicks})")
-                                    
-                                    if failed_clicks >= max_failed_clicks:
-                                        print(f"  ✅ {page_num-1} páginas - fim detectado")
-                                        break
-                                    
-                                    await asyncio.sleep(2)
-                                    continue
-                                
-                                print(f"  ➡️ Página {page_num}...")
-                                await asyncio.sleep(5)
-                                
-                            except Exception as e:
-                                if self.debug:
-                                    print(f"  ⚠️ Erro na página {page_num}: {type(e).__name__}")
-                                break
-                    
-                    section_total = len(all_lots) - lots_before
-                    print(f"  ✅ TOTAL DA SEÇÃO: {section_total} lotes únicos")
-                
-                except Exception as e:
-                    print(f"  ❌ Erro: {e}")
-            
-            await browser.close()
+                    section_results = await self._scrape_sections(browser, seen_lot_ids)
+                finally:
+                    await browser.close()
+        
+        all_lots = []
+        for url, result in zip(self.urls, section_results):
+            if isinstance(result, BaseException):
+                print(f"  ❌ Seção {url.split('/')[3]} falhou: {result}")
+                continue
+            all_lots.extend(result)
         
         print(f"\n✅ {len(all_lots)} lotes únicos capturados no total")
         
         # Processa lotes
         items = []
         categories = {}
+        with_bids = 0  # ✅ Contadores locais, somados em self.stats uma vez no fim
+        errors = 0
         
         for lot in all_lots:
+            # ✅ Guarda só em volta da normalização: um lote com formato inesperado
+            # conta como erro em vez de derrubar a execução inteira
             try:
                 item = self._normalize_lot(lot)
-                if item:
-                    items.append(item)
-                    
-                    cat = item.get('categoria', 'Outros')
-                    if cat not in categories:
-                        categories[cat] = 0
-                    categories[cat] += 1
-                    
-                    if item.get('has_bid'):
-                        self.stats['with_bids'] += 1
             except Exception as e:
-                self.stats['errors'] += 1
+                errors += 1
+                if self.debug:
+                    print(f"  ⚠️ Erro ao normalizar lote {lot.get('id')}: {type(e).__name__}: {e}")
+                continue
+            
+            if not item:
+                continue
+            
+            items.append(item)
+            
+            cat = item.get('categoria', 'Outros')
+            if cat not in categories:
+                categories[cat] = 0
+            categories[cat] += 1
+            
+            if item.get('has_bid'):
+                with_bids += 1
         
+        self.stats['with_bids'] += with_bids
+        self.stats['errors'] += errors
         self.stats['total_scraped'] = len(items)
         
         print(f"\n📊 Por Categoria Refinada (10 categorias):")
@@ -448,11 +490,241 @@ class SodreScraperFinal:
         
         return items
     
-    async def _validate_links_batch(self, items: List[Dict], batch_size: int = 20) -> List[Dict]:
+    async def _scrape_sections(self, browser, seen_lot_ids: set) -> list:
+        """Coleta todas as seções em paralelo; retorna lotes (ou exceção) por URL"""
+        # 🔥 Um único contexto (com bloqueio de recursos) para todas as seções;
+        # cada seção abre só a sua página
+        context = await browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            locale='pt-BR'
+        )
+        await context.route('**/*', _block_heavy_resources)
+        
+        try:
+            # 🔥 Seções em PARALELO, cada uma com sua página e sua própria lista;
+            # a falha de uma seção não derruba as outras
+            return await asyncio.gather(*[
+                self._scrape_section(context, url, seen_lot_ids)
+                for url in self.urls
+            ], return_exceptions=True)
+        finally:
+            await context.close()
+    
+    async def _scrape_section(self, context, url: str, seen_lot_ids: set) -> List[Dict]:
+        """
+        Coleta uma seção (veiculos, imoveis, ...) em página própria
+        
+        Retorna os lotes novos da seção; `seen_lot_ids` é compartilhado entre
+        as seções para deduplicar (event loop único, sem necessidade de lock).
+        """
+        section_name = url.split('/')[3]
+        tag = section_name.upper()
+        section = {'api_calls': 0, 'responses': 0, 'in_flight': 0, 'last_capture': 0, 'lots': 0, 'total_pages': 0, 'per_page': 0, 'last_page_size': 0}
+        lots = []
+        seen_bodies = set()  # 🔥 Hash dos payloads já processados (respostas repetidas)
+        data_ready = asyncio.Event()  # 🔥 Sinalizado a cada resposta da API processada
+        handlers_idle = asyncio.Event()  # 🔥 Setado quando não há handler de resposta em andamento
+        handlers_idle.set()
+        
+        config = self.section_config.get(section_name, {'wait_time': 7, 'max_retries': 3, 'max_pages': 200})
+        
+        print(f"\n📦 {tag}")
+        print(f"  [{tag}] ⏱️ Tempo de espera: {config['wait_time']}s | Máx páginas: {config['max_pages']}")
+        
+        async def wait_responses(target: int, timeout: float):
+            """Espera até `target` respostas da API processadas na seção"""
+            async def _wait():
+                while section['responses'] < target:
+                    data_ready.clear()
+                    await data_ready.wait()
+            await asyncio.wait_for(_wait(), timeout=timeout)
+        
+        async def intercept_response(response):
+            if '/api/search-lots' not in response.url or response.status != 200:
+                return
+            section['in_flight'] += 1
+            handlers_idle.clear()
+            try:
+                section['api_calls'] += 1
+                
+                # 🔥 Parse em thread: não trava o loop que dirige a página
+                raw = await response.body()
+                
+                # ✅ Payload idêntico a um já processado: não decodifica de novo
+                body_hash = hashlib.blake2b(raw, digest_size=16).digest()
+                if body_hash in seen_bodies:
+                    if self.debug:
+                        print(f"     [{tag}] ⚪ API call #{section['api_calls']}: resposta repetida")
+                    return
+                seen_bodies.add(body_hash)
+                
+                data = await asyncio.to_thread(_json_loads, raw)
+                per_page = data.get('perPage', 0)
+                
+                if per_page > 0:
+                    # ✅ Total de lotes informado pela API → nº real de páginas da seção
+                    if not section['total_pages']:
+                        total = data.get('total')
+                        if total is None:
+                            total = data.get('hits', {}).get('total')
+                            if isinstance(total, dict):
+                                total = total.get('value')
+                        if isinstance(total, int) and total > 0:
+                            section['total_pages'] = -(-total // per_page)
+                    
+                    results = data.get('results', [])
+                    
+                    new_lots = 0
+                    
+                    # Extrai lotes da resposta (results ou hits[*]._source)
+                    if results:
+                        source = results
+                        is_hit = False
+                    else:
+                        source = data.get('hits', {}).get('hits', [])
+                        is_hit = True
+                    
+                    # Tamanho da página recebida (página incompleta = última)
+                    section['per_page'] = per_page
+                    section['last_page_size'] = len(source)
+                    
+                    # ✅ Extrai e deduplica em uma única passada
+                    for lot in source:
+                        if is_hit:
+                            lot = lot.get('_source', lot)
+                        lot_id = lot.get('id') or lot.get('lot_id')
+                        if not lot_id:
+                            continue
+                        lot_key = _lot_key(lot_id)
+                        if lot_key not in seen_lot_ids:
+                            seen_lot_ids.add(lot_key)
+                            lots.append(lot)
+                            new_lots += 1
+                    
+                    if new_lots > 0:
+                        section['last_capture'] = time.time()
+                        section['lots'] += new_lots
+                        self.section_counters[section_name] = section['lots']
+                        
+                        print(f"     [{tag}] 📥 API call #{section['api_calls']}: +{new_lots} lotes únicos | Total: {section['lots']}")
+                    else:
+                        if self.debug:
+                            total = len(source)
+                            print(f"     [{tag}] ⚪ API call #{section['api_calls']}: 0 novos ({total} duplicatas)")
+                    
+                    section['responses'] += 1
+                    data_ready.set()
+            except:
+                pass
+            finally:
+                section['in_flight'] -= 1
+                if not section['in_flight']:
+                    handlers_idle.set()
+        
+        page = None
+        try:
+            page = await context.new_page()
+            page.on('response', intercept_response)
+            
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            
+            print(f"  [{tag}] ⏳ Aguardando carregamento inicial...")
+            
+            # ✅ Espera orientada a evento: segue assim que a 1ª resposta da API chega
+            initial_timeout = config['wait_time'] * config['max_retries']
+            try:
+                await wait_responses(1, initial_timeout)
+                print(f"  [{tag}] ✅ {section['lots']} lotes capturados")
+            except asyncio.TimeoutError:
+                print(f"  [{tag}] ⚠️ Nenhum dado capturado em {initial_timeout}s")
+            
+            # ✅ PAGINAÇÃO ROBUSTA (só se a 1ª página veio cheia)
+            if section['lots'] > 0 and section['last_page_size'] >= section['per_page']:
+                failed_clicks = 0
+                max_failed_clicks = 5
+                
+                # 🔥 Para na última página real (quando a API informa o total),
+                # em vez de clicar até max_pages e depender de falhas de clique
+                last_page = min(section['total_pages'] or config['max_pages'], config['max_pages'])
+                if section['total_pages'] and self.debug:
+                    print(f"  [{tag}] 📄 {section['total_pages']} páginas segundo a API")
+                
+                # 🔥 Cada clique efetivo gera uma resposta: a página N é a resposta
+                # `base + N - 1` (resposta atrasada da página anterior não conta como a atual)
+                base_responses = section['responses']
+                
+                page_num = 2
+                while page_num <= last_page:
+                    try:
+                        # ✅ Um único round-trip: rola, procura e clica no "Avançar" dentro da página
+                        # (se o botão ainda não renderizou, o caminho de "não encontrado" espera por ele)
+                        button_found = await page.evaluate(NEXT_PAGE_JS, list(self.NEXT_SELECTORS))
+                        
+                        if not button_found:
+                            failed_clicks += 1
+                            if self.debug:
+                                print(f"    [{tag}] ⚠️ Botão não encontrado (tentativa {failed_clicks}/{max_failed_clicks})")
+                            
+                            if failed_clicks >= max_failed_clicks:
+                                print(f"  [{tag}] ✅ {page_num-1} páginas - fim detectado")
+                                break
+                            
+                            # ✅ Acorda assim que o botão aparecer (em vez de sleep fixo de 2s)
+                            try:
+                                await page.wait_for_selector(NEXT_BUTTON_SELECTOR, state='visible', timeout=2000)
+                            except PlaywrightTimeoutError:
+                                pass
+                            continue
+                        
+                        failed_clicks = 0
+                        print(f"  [{tag}] ➡️ Página {page_num}...")
+                        
+                        try:
+                            await wait_responses(base_responses + page_num - 1, config['wait_time'])
+                        except asyncio.TimeoutError:
+                            if self.debug:
+                                print(f"    [{tag}] ⚠️ Página {page_num} sem resposta da API em {config['wait_time']}s")
+                        else:
+                            # 🔥 Página incompleta: não há próxima (sem cliques extras)
+                            if section['last_page_size'] < section['per_page']:
+                                print(f"  [{tag}] ✅ {page_num} páginas - última página incompleta")
+                                break
+                        
+                        # Só avança após clique efetivo (falhas não consomem páginas)
+                        page_num += 1
+                        
+                    except Exception as e:
+                        if self.debug:
+                            print(f"  [{tag}] ⚠️ Erro na página {page_num}: {type(e).__name__}")
+                        break
+            
+            print(f"  [{tag}] ✅ TOTAL DA SEÇÃO: {section['lots']} lotes únicos")
+        
+        except Exception as e:
+            print(f"  [{tag}] ❌ Erro: {e}")
+        
+        finally:
+            # ✅ Fecha a página explicitamente (o contexto é compartilhado entre seções),
+            # depois que os handlers de resposta ainda em andamento terminarem
+            if page is not None:
+                if section['in_flight']:
+                    try:
+                        await asyncio.wait_for(handlers_idle.wait(), timeout=config['wait_time'])
+                    except asyncio.TimeoutError:
+                        pass
+                await page.close()
+        
+        return lots
+    
+    async def _validate_links_batch(self, items: List[Dict], batch_size: int = 20, browser=None) -> List[Dict]:
         """
         🔥 VALIDA LINKS em batches paralelos
         Acessa cada link e verifica se redireciona para 'lotes-encerrados'
         
+        `browser` opcional, como em scrape(): reusa o Chromium do chamador
+        (não é fechado aqui); sem ele, lança e fecha um próprio.
+        
         Returns:
             Lista de itens ativos (filtra encerrados)
         """
@@ -464,11 +736,36 @@ class SodreScraperFinal:
         print(f"  ⚠️  Isso pode demorar alguns minutos...")
         print()
         
+        if browser is not None:
+            active_items, filtered_by_link = await self._validate_links_in(browser, items, batch_size)
+        else:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True, args=list(CHROMIUM_ARGS))
+                try:
+                    active_items, filtered_by_link = await self._validate_links_in(browser, items, batch_size)
+                finally:
+                    await browser.close()
+        
+        print()
+        print(f"  ✅ RESULTADO:")
+        print(f"     Lotes ativos: {len(active_items)}")
+        print(f"     Lotes filtrados (encerrados): {filtered_by_link}")
+        print("="*70)
+        
+        self.stats['filtered_by_link_validation'] = filtered_by_link
+        
+        return active_items
+    
+    async def _validate_links_in(self, browser, items: List[Dict], batch_size: int):
+        """Valida os links em um contexto próprio do `browser`; retorna (ativos, nº filtrados)"""
         active_items = []
         filtered_by_link = 0
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
+        # 🔥 Contexto único com bloqueio de imagens/fontes/CSS/analytics:
+        # a validação só olha a URL final (redirect), nunca o visual da página
+        context = await browser.new_context(locale='pt-BR')
+        try:
+            await context.route('**/*', _block_heavy_resources)
             
             for i in range(0, len(items), batch_size):
                 batch = items[i:i+batch_size]
@@ -480,7 +777,7 @@ class SodreScraperFinal:
                 for item in batch:
                     link = item.get('link')
                     if link:
-                        tasks.append(self._check_link_active(link, browser))
+                        tasks.append(self._check_link_active(link, context))
                     else:
                         tasks.append(asyncio.sleep(0, result=True))  # Sem link = aceita
                 
@@ -511,20 +808,12 @@ class SodreScraperFinal:
                 # Pequeno delay entre batches
                 if i + batch_size < len(items):
                     await asyncio.sleep(0.5)
-            
-            await browser.close()
+        finally:
+            await context.close()
         
-        print()
-        print(f"  ✅ RESULTADO:")
-        print(f"     Lotes ativos: {len(active_items)}")
-        print(f"     Lotes filtrados (encerrados): {filtered_by_link}")
-        print("="*70)
-        
-        self.stats['filtered_by_link_validation'] = filtered_by_link
-        
-        return active_items
+        return active_items, filtered_by_link
     
-    async def _check_link_active(self, link: str, browser) -> bool:
+    async def _check_link_active(self, link: str, context) -> bool:
         """
         Verifica se um link está ativo
         
@@ -535,7 +824,7 @@ class SodreScraperFinal:
             False: lote encerrado (redirecionou para /lotes-encerrados/)
         """
         try:
-            page = await browser.new_page()
+            page = await context.new_page()
             
             try:
                 # Acessa o link
@@ -570,30 +859,41 @@ class SodreScraperFinal:
         if not value:
             return None
         
-        try:
-            from datetime import datetime
-            
-            if isinstance(value, datetime):
-                return value
-            
-            # Tenta vários formatos
-            formats = [
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%dT%H:%M:%S',
-                '%Y-%m-%d',
-                '%d/%m/%Y %H:%M:%S',
-                '%d/%m/%Y',
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(str(value)[:19], fmt)
-                except:
-                    continue
-            
-            return None
-        except:
-            return None
+        if isinstance(value, datetime):
+            return value
+        
+        # ✅ Fast-path: só os formatos exatos YYYY-MM-DD e YYYY-MM-DD[ T]HH:MM:SS
+        # (fromisoformat aceitaria também formas com offset → datetime "aware")
+        text = str(value)[:19]
+        if len(text) == 10:
+            is_iso = text[4] == '-' and text[7] == '-'
+        elif len(text) == 19:
+            is_iso = (text[4] == '-' and text[7] == '-' and text[10] in ' T'
+                      and text[13] == ':' and text[16] == ':')
+        else:
+            is_iso = False
+        if is_iso:
+            try:
+                return datetime.fromisoformat(text)
+            except ValueError:
+                pass
+        
+        # Tenta vários formatos
+        formats = [
+            '%Y-%m-%d %H:%M:%S',
+            '%Y-%m-%dT%H:%M:%S',
+            '%Y-%m-%d',
+            '%d/%m/%Y %H:%M:%S',
+            '%d/%m/%Y',
+        ]
+        
+        for fmt in formats:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+        
+        return None
     
     def _is_auction_active(self, lot: Dict) -> bool:
         """
@@ -604,35 +904,33 @@ class SodreScraperFinal:
         - lot_status é 'encerrado', 'finalizado', 'vendido', etc.
         - E auction_date_end já passou há mais de 7 dias
         """
-        try:
-            from datetime import datetime
-            now = datetime.now()
-            
-            # 1️⃣ Verifica auction_status
-            auction_status = str(lot.get('auction_status', '')).lower()
-            if auction_status in ['encerrado', '3', 'closed', 'finalizado', 'finished']:
-                # Se tem status encerrado, só aceita se for muito recente (margem para 2ª praça)
-                date_end = self._parse_datetime_obj(lot.get('auction_date_end'))
-                if date_end and (now - date_end).days > 7:
-                    return False
-            
-            # 2️⃣ 🔥 NOVO: Verifica lot_status
-            lot_status = str(lot.get('lot_status', '')).lower()
-            if lot_status in ['encerrado', 'finalizado', 'vendido', 'sold', 'closed']:
-                self.stats['filtered_invalid_status'] += 1
-                return False
-            
-            # 3️⃣ Verifica se data de fim já passou há muito tempo
-            date_end = self._parse_datetime_obj(lot.get('auction_date_end'))
-            if date_end and (now - date_end).days > 14:
+        now = datetime.now()
+        
+        date_end = self._parse_datetime_obj(lot.get('auction_date_end'))
+        # ✅ Compara sempre em horário local "naive" (datetime com fuso viria de um
+        # valor já tipado; subtrair aware de naive levantaria TypeError)
+        if date_end is not None and date_end.tzinfo is not None:
+            date_end = date_end.astimezone().replace(tzinfo=None)
+        
+        # 1️⃣ Verifica auction_status
+        auction_status = str(lot.get('auction_status', '')).lower()
+        if auction_status in CLOSED_AUCTION_STATUSES:
+            # Se tem status encerrado, só aceita se for muito recente (margem para 2ª praça)
+            if date_end and (now - date_end).days > 7:
                 return False
-            
-            # 4️⃣ Se passou nas verificações, aceita
-            return True
-            
-        except Exception as e:
-            # Em caso de erro, aceita (safe)
-            return True
+        
+        # 2️⃣ 🔥 NOVO: Verifica lot_status
+        lot_status = str(lot.get('lot_status', '')).lower()
+        if lot_status in CLOSED_LOT_STATUSES:
+            self.stats['filtered_invalid_status'] += 1
+            return False
+        
+        # 3️⃣ Verifica se data de fim já passou há muito tempo
+        if date_end and (now - date_end).days > 14:
+            return False
+        
+        # 4️⃣ Se passou nas verificações, aceita
+        return True
     
     def _normalize_lot(self, lot: Dict) -> Dict:
         """
@@ -640,171 +938,125 @@ class SodreScraperFinal:
         ✅ Todos os campos mapeados corretamente
         ✅ FILTRA leilões encerrados
         """
+        g = lot.get  # ✅ Lookup único do método (chamado ~80x por lote)
+        safe_str = self._safe_str  # ✅ Helpers ligados uma vez (evita self.<attr> por campo)
+        parse_int = self._parse_int
+        parse_numeric = self._parse_numeric
+        parse_datetime = self._parse_datetime
+        
+        lot_id = g('id') or g('lot_id')
+        if not lot_id:
+            return None
+        
+        # ✅ Única conversão que pode falhar aqui: try estreito, sem try/except no método todo
         try:
-            lot_id = lot.get('id') or lot.get('lot_id')
-            if not lot_id:
-                return None
+            lot_id = int(lot_id)
+        except (TypeError, ValueError):
+            return None
+        
+        # 🔥 FILTRO: Verifica se leilão está ativo ANTES de processar
+        if not self._is_auction_active(lot):
+            self.stats['filtered_closed'] += 1
+            return None
+        
+        external_id = f"sodre_{lot_id}"
+        
+        # ✅ Captura auction_id para usar no link
+        auction_id = parse_int(g('auction_id'))
+        
+        # Extrai categoria original
+        original_category = safe_str(g('category') or g('lot_category') or g('lot_subcategory') or g('subcategory'))
+        
+        # 🔥 CATEGORIZA (10 categorias refinadas)
+        categoria_refinada = self._categorize_item(original_category)
+        
+        # ✅ MAPEAMENTO CONFORME SCHEMA: campos derivados/compostos
+        item = {
+            # IDs e identificadores
+            'external_id': external_id,
+            'lot_id': lot_id,
+            'auction_id': auction_id,  # ✅ Usa a variável capturada
             
-            try:
-                lot_id = int(lot_id)
-            except:
-                return None
+            # Categorias
+            'category': original_category,  # categoria original do Sodré
+            'categoria': categoria_refinada,  # 🔥 categoria refinada (10 categorias)
             
-            # 🔥 FILTRO: Verifica se leilão está ativo ANTES de processar
-            if not self._is_auction_active(lot):
-                self.stats['filtered_closed'] += 1
-                return None
+            # Textos principais
+            'title': (
+                safe_str(g('title')) or 
+                safe_str(g('lot_title')) or 
+                safe_str(g('lot_type_name')) or 
+                'Sem título'
+            ),
+            'description': safe_str(g('description') or g('lot_description')),
             
-            external_id = f"sodre_{lot_id}"
+            # Leilão
+            'auction_date_init': parse_datetime(g('auction_date_init') or g('auction_date')),
+            'auction_date_2': parse_datetime(g('auction_date_2')),
+            'auction_date_end': parse_datetime(g('auction_date_end')),
             
-            # ✅ Captura auction_id para usar no link
-            auction_id = self._parse_int(lot.get('auction_id'))
+            # Lances
+            'bid_initial': parse_numeric(g('bid_initial') or g('initial_bid')),
+            'bid_actual': parse_numeric(g('bid_actual') or g('current_bid')),
             
-            # Extrai categoria original
-            original_category = self._safe_str(lot.get('category') or lot.get('lot_category') or lot.get('lot_subcategory') or lot.get('subcategory'))
+            # Veículos
+            'lot_optionals': self._parse_optionals(g('lot_optionals')),
             
-            # 🔥 CATEGORIZA (10 categorias refinadas)
-            categoria_refinada = self._categorize_item(original_category)
+            # Imagem e link
+            'image_url': self._parse_image(g('image_url') or g('lot_image_url') or g('lot_pictures')),
+            # 🔥 LINK: Usa o campo 'link' da API (já vem correto) ou constrói como fallback
+            'link': safe_str(g('link')) or (f"{self.auction_url_prefix}{auction_id}/lote/{lot_id}/" if auction_id else self.lot_url_prefix + str(lot_id)),
             
-            # ✅ MAPEAMENTO COMPLETO CONFORME SCHEMA
-            item = {
-                # IDs e identificadores
-                'external_id': external_id,
-                'lot_id': lot_id,
-                'lot_number': self._safe_str(lot.get('lot_number')),
-                'lot_inspection_number': self._safe_str(lot.get('lot_inspection_number')),
-                'lot_inspection_id': self._parse_int(lot.get('lot_inspection_id')),
-                'auction_id': auction_id,  # ✅ Usa a variável capturada
-                
-                # Categorias e segmentos
-                'category': original_category,  # categoria original do Sodré
-                'categoria': categoria_refinada,  # 🔥 categoria refinada (10 categorias)
-                'segment_id': self._safe_str(lot.get('segment_id')),
-                'segment_label': self._safe_str(lot.get('segment_label')),
-                'segment_slug': self._safe_str(lot.get('segment_slug')),
-                'lot_category': self._safe_str(lot.get('lot_category')),
-                
-                # Textos principais
-                'title': (
-                    self._safe_str(lot.get('title')) or 
-                    self._safe_str(lot.get('lot_title')) or 
-                    self._safe_str(lot.get('lot_type_name')) or 
-                    'Sem título'
-                ),
-                'description': self._safe_str(lot.get('description') or lot.get('lot_description')),
-                
-                # Localização
-                'lot_location': self._safe_str(lot.get('lot_location')),
-                'city': self._safe_str(lot.get('city')),
-                'state': self._safe_str(lot.get('state')),
-                
-                # Leilão
-                'auction_name': self._safe_str(lot.get('auction_name')),
-                'auction_status': self._safe_str(lot.get('auction_status')),
-                'auction_date_init': self._parse_datetime(lot.get('auction_date_init') or lot.get('auction_date')),
-                'auction_date_2': self._parse_datetime(lot.get('auction_date_2')),
-                'auction_date_end': self._parse_datetime(lot.get('auction_date_end')),
-                
-                # Leiloeiro e cliente
-                'auctioneer_name': self._safe_str(lot.get('auctioneer_name')),
-                'client_id': self._parse_int(lot.get('client_id')),
-                'client_name': self._safe_str(lot.get('client_name')),
-                
-                # Lances
-                'bid_initial': self._parse_numeric(lot.get('bid_initial') or lot.get('initial_bid')),
-                'bid_actual': self._parse_numeric(lot.get('bid_actual') or lot.get('current_bid')),
-                'bid_has_bid': bool(lot.get('bid_has_bid', False)),
-                'bid_user_nickname': self._safe_str(lot.get('bid_user_nickname')),
-                
-                # Veículos
-                'lot_brand': self._safe_str(lot.get('lot_brand')),
-                'lot_model': self._safe_str(lot.get('lot_model')),
-                'lot_year_manufacture': self._parse_int(lot.get('lot_year_manufacture')),
-                'lot_year_model': self._parse_int(lot.get('lot_year_model')),
-                'lot_plate': self._safe_str(lot.get('lot_plate')),
-                'lot_color': self._safe_str(lot.get('lot_color')),
-                'lot_km': self._parse_int(lot.get('lot_km')),
-                'lot_fuel': self._safe_str(lot.get('lot_fuel')),
-                'lot_transmission': self._safe_str(lot.get('lot_transmission')),
-                'lot_sinister': self._safe_str(lot.get('lot_sinister')),
-                'lot_origin': self._safe_str(lot.get('lot_origin')),
-                'lot_optionals': self._parse_optionals(lot.get('lot_optionals')),
-                'lot_tags': self._safe_str(lot.get('lot_tags')),
-                
-                # Imagem e link
-                'image_url': self._parse_image(lot.get('image_url') or lot.get('lot_image_url') or lot.get('lot_pictures')),
-                # 🔥 LINK: Usa o campo 'link' da API (já vem correto) ou constrói como fallback
-                'link': self._safe_str(lot.get('link')) or (f"https://leilao.sodresantoro.com.br/leilao/{auction_id}/lote/{lot_id}/" if auction_id else f"{self.base_url}/lote/{lot_id}"),
-                
-                # Status e flags
-                'lot_status': self._safe_str(lot.get('lot_status')),
-                'lot_status_id': self._parse_int(lot.get('lot_status_id')),
-                'lot_is_judicial': bool(lot.get('lot_is_judicial', False)),
-                'lot_is_scrap': bool(lot.get('lot_is_scrap', False)),
-                'lot_financeable': bool(lot.get('lot_financeable') or lot.get('lot_status_financeable', False)),
-                'is_highlight': bool(lot.get('is_highlight', False)),
-                'lot_test': bool(lot.get('lot_test', False)),
-                'lot_visits': self._parse_int(lot.get('lot_visits')) or 0,
-                
-                # Source e controle
-                'source': self.source,
-                'is_active': True,
-                'has_bid': bool(lot.get('bid_has_bid', False)),
-                
-                # Campos judiciais (imóveis)
-                'lot_judicial_process': self._safe_str(lot.get('lot_judicial_process')),
-                'lot_judicial_action': self._safe_str(lot.get('lot_judicial_action')),
-                'lot_judicial_executor': self._safe_str(lot.get('lot_judicial_executor')),
-                'lot_judicial_executed': self._safe_str(lot.get('lot_judicial_executed')),
-                'lot_judicial_judge': self._safe_str(lot.get('lot_judicial_judge')),
-                'tj_praca_value': self._parse_numeric(lot.get('tj_praca_value')),
-                'tj_praca_discount': self._parse_numeric(lot.get('tj_praca_discount')),
-                
-                # Imóveis - endereço
-                'lot_neighborhood': self._safe_str(lot.get('lot_neighborhood')),
-                'lot_street': self._safe_str(lot.get('lot_street')),
-                
-                # Imóveis - características
-                'lot_dormitories': self._parse_int(lot.get('lot_dormitories')),
-                'lot_useful_area': self._parse_numeric(lot.get('lot_useful_area')),
-                'lot_total_area': self._parse_numeric(lot.get('lot_total_area')),
-                'lot_suites': self._parse_int(lot.get('lot_suites')),
-                
-                # Materiais - subcategoria original
-                'lot_subcategory': original_category,
-                'lot_type_name': self._safe_str(lot.get('lot_type_name')),
-                
-                # Metadata
-                'metadata': self._build_metadata(lot),
-            }
+            # Status e flags
+            'lot_financeable': bool(g('lot_financeable') or g('lot_status_financeable', False)),
+            'lot_visits': parse_int(g('lot_visits')) or 0,
+            
+            # Source e controle
+            'source': self.source,
+            'is_active': True,
+            'has_bid': bool(g('bid_has_bid', False)),
+            
+            # Materiais - subcategoria original
+            'lot_subcategory': original_category,
             
-            # Remove None values
-            return {k: v for k, v in item.items() if v is not None}
+            # Metadata
+            'metadata': self._build_metadata(lot),
+        }
         
-        except Exception as e:
-            if self.debug:
-                print(f"  ⚠️ Erro ao normalizar lote {lot.get('id')}: {e}")
-            return None
-    
-    def _build_metadata(self, lot: Dict) -> Dict:
-        """Constrói metadata com campos extras"""
-        metadata = {}
+        # Remove None values
+        item = {k: v for k, v in item.items() if v is not None}
         
-        extra_fields = ['segment_base', 'search_terms']
+        # 🔥 Campos 1:1 (mesmo nome na API e no schema): laço único por tipo
+        for fields, parse in (
+            (LOT_STR_FIELDS, safe_str),
+            (LOT_INT_FIELDS, parse_int),
+            (LOT_NUMERIC_FIELDS, parse_numeric),
+        ):
+            for field in fields:
+                value = parse(g(field))
+                if value is not None:
+                    item[field] = value
         
-        for field in extra_fields:
-            val = lot.get(field)
-            if val:
-                metadata[field] = val
+        for field in LOT_BOOL_FIELDS:
+            item[field] = bool(g(field))
         
-        return metadata if metadata else {}
+        return item
+    
+    def _build_metadata(self, lot: Dict) -> Dict:
+        """Constrói metadata com campos extras (só os preenchidos)"""
+        g = lot.get
+        return {field: val for field in METADATA_EXTRA_FIELDS if (val := g(field))}
     
     def _parse_optionals(self, value):
         """Parse lot_optionals para array"""
         if not value:
             return None
         if isinstance(value, list):
-            return [str(opt) for opt in value if opt]
+            # ✅ Caso comum (lista de str): filtro em C, sem str() por opcional
+            options = list(filter(None, value))
+            if all(type(opt) is str for opt in options):
+                return options
+            return [str(opt) for opt in options]
         if isinstance(value, str):
             return [value]
         return None
@@ -822,46 +1074,91 @@ class SodreScraperFinal:
     def _safe_str(self, value) -> str:
         if value is None:
             return None
-        try:
-            result = str(value).strip()
-            return result if result else None
-        except:
-            return None
+        # ✅ Valores vindos do JSON já são str na maioria: evita str() e try/except
+        if type(value) is not str:
+            value = str(value)
+        return value.strip() or None
     
     def _parse_datetime(self, value) -> str:
-        if not value:
+        if not value or not isinstance(value, str):
             return None
+        
+        value = value.replace('Z', '+00:00')
+        if 'T' in value:
+            return value
+        
+        # ✅ Fast-path 'YYYY-MM-DD HH:MM:SS' (formato da API): valida com
+        # fromisoformat (C) e monta o ISO por fatiamento, sem strptime/strftime
+        if (len(value) == 19 and value[4] == '-' and value[7] == '-'
+                and value[10] == ' ' and value[13] == ':' and value[16] == ':'):
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                return None
+            return value[:10] + 'T' + value[11:] + '+00:00'
+        
         try:
-            if isinstance(value, str):
-                value = value.replace('Z', '+00:00')
-                if 'T' in value:
-                    return value
-                try:
-                    dt = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-                    return dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
-                except:
-                    pass
-        except:
-            pass
-        return None
+            dt = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return None
+        return dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
     
     def _parse_numeric(self, value):
         if value is None:
             return None
+        # ✅ Fast-path: API já devolve números tipados na maioria dos campos
+        if type(value) is float:
+            return value
+        # ints também passam pelo try: float() estoura em inteiros gigantes
         try:
             return float(value)
-        except:
+        except (TypeError, ValueError, OverflowError):
             return None
     
     def _parse_int(self, value):
         if value is None:
             return None
+        if type(value) is int:
+            return value
         try:
             return int(value)
-        except:
+        except (TypeError, ValueError, OverflowError):
             return None
 
 
+def _json_dumps_std(item) -> bytes:
+    return json.dumps(item, ensure_ascii=False).encode('utf-8')
+
+
+def _write_json(path: Path, data) -> None:
+    """Salva a lista de itens em JSON, item a item (sem montar o texto inteiro em memória)"""
+    # 🔥 Sem indent: o arquivo é consumido por máquina, não por humanos
+    if orjson is not None:
+        def dumps(item):
+            try:
+                return orjson.dumps(item)
+            except orjson.JSONEncodeError:
+                # ✅ orjson não serializa inteiros > 64 bits: cai no json da stdlib só para este item
+                return _json_dumps_std(item)
+    else:
+        dumps = _json_dumps_std
+    
+    # ✅ Escreve em arquivo temporário e só renomeia no sucesso (nunca deixa JSON truncado)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(b'[')
+            for i, item in enumerate(data):
+                if i:
+                    f.write(b',\n')
+                f.write(dumps(item))
+            f.write(b']')
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 async def main():
     print("\n" + "="*70)
     print("🚀 SODRÉ SANTORO - SCRAPER FINAL")
@@ -871,6 +1168,7 @@ async def main():
     
     start_time = time.time()
     supabase = None
+    scraper = None
     
     try:
         if SupabaseClient:
@@ -888,26 +1186,33 @@ async def main():
         
         print("\n🔥 FASE 1: COLETANDO DADOS")
         scraper = SodreScraperFinal(debug=False)
-        items = await scraper.scrape()
-        
-        print(f"\n✅ Total coletado: {len(items)} itens")
-        print(f"🔥 Itens com lances: {scraper.stats['with_bids']}")
-        print(f"⏭️  Filtrados (encerrados): {scraper.stats['filtered_closed']}")
-        print(f"🔍 Filtrados (status inválido): {scraper.stats['filtered_invalid_status']}")
-        print(f"⚠️  Erros: {scraper.stats['errors']}")
-        
-        if not items:
-            print("⚠️ Nenhum item coletado")
-            if supabase:
-                supabase.heartbeat_finish(status='warning', final_stats={
-                    'items_collected': 0,
-                })
-            return
         
-        # 🔥 FASE 2: VALIDA LINKS (verificando redirecionamentos)
-        print("\n🔥 FASE 2: VALIDANDO LINKS")
-        # batch_size=10 porque cada lote espera 3 segundos
-        validated_items = await scraper._validate_links_batch(items, batch_size=10)
+        # 🔥 Um único Chromium para a coleta e a validação de links
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=list(CHROMIUM_ARGS))
+            try:
+                items = await scraper.scrape(browser)
+                
+                print(f"\n✅ Total coletado: {len(items)} itens")
+                print(f"🔥 Itens com lances: {scraper.stats['with_bids']}")
+                print(f"⏭️  Filtrados (encerrados): {scraper.stats['filtered_closed']}")
+                print(f"🔍 Filtrados (status inválido): {scraper.stats['filtered_invalid_status']}")
+                print(f"⚠️  Erros: {scraper.stats['errors']}")
+                
+                if not items:
+                    print("⚠️ Nenhum item coletado")
+                    if supabase:
+                        supabase.heartbeat_finish(status='warning', final_stats={
+                            'items_collected': 0,
+                        })
+                    return
+                
+                # 🔥 FASE 2: VALIDA LINKS (verificando redirecionamentos)
+                print("\n🔥 FASE 2: VALIDANDO LINKS")
+                # batch_size=10 porque cada lote espera 3 segundos
+                validated_items = await scraper._validate_links_batch(items, batch_size=10, browser=browser)
+            finally:
+                await browser.close()
         
         print(f"\n📊 RESUMO APÓS VALIDAÇÃO:")
         print(f"  ✅ Lotes válidos (ativos): {len(validated_items)}")
@@ -928,30 +1233,48 @@ async def main():
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         json_file = output_dir / f'sodre_validated_{timestamp}.json'
         
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(validated_items, f, ensure_ascii=False, indent=2)
-        print(f"\n💾 JSON: {json_file}")
+        # 🔥 Grava o JSON em thread, em paralelo com o upload para o Supabase
+        write_task = asyncio.create_task(asyncio.to_thread(_write_json, json_file, validated_items))
+        
+        json_error = None
+        try:
+            # Insere no Supabase
+            if supabase:
+                print("\n📤 FASE 3: INSERINDO NO SUPABASE")
+                print(f"  📤 sodre_items: {len(validated_items)} itens")
+                stats = await asyncio.to_thread(supabase.upsert, 'sodre_items', validated_items)
+                
+                print(f"    ✅ Inseridos/Atualizados: {stats['inserted']}")
+                if stats.get('duplicates_removed', 0) > 0:
+                    print(f"    🔄 Duplicatas removidas: {stats['duplicates_removed']}")
+                if stats['errors'] > 0:
+                    print(f"    ⚠️ Erros: {stats['errors']}")
         
-        # Insere no Supabase
+        finally:
+            # ✅ Aguarda a gravação mesmo se o upload falhar; erro no JSON é guardado
+            # aqui sem mascarar a exceção do upload
+            try:
+                await write_task
+                print(f"\n💾 JSON: {json_file}")
+            except Exception as e:
+                json_error = e
+                print(f"\n⚠️ Erro ao salvar JSON {json_file}: {e}")
+        
+        # ✅ Heartbeat só depois de saber se o JSON foi gravado
         if supabase:
-            print("\n📤 FASE 3: INSERINDO NO SUPABASE")
-            print(f"  📤 sodre_items: {len(validated_items)} itens")
-            stats = supabase.upsert('sodre_items', validated_items)
-            
-            print(f"    ✅ Inseridos/Atualizados: {stats['inserted']}")
-            if stats.get('duplicates_removed', 0) > 0:
-                print(f"    🔄 Duplicatas removidas: {stats['duplicates_removed']}")
-            if stats['errors'] > 0:
-                print(f"    ⚠️ Erros: {stats['errors']}")
-            
-            supabase.heartbeat_success(final_stats={
+            final_stats = {
                 'items_collected': len(items),
                 'items_validated': len(validated_items),
                 'items_filtered_by_link': scraper.stats['filtered_by_link_validation'],
                 'items_inserted': stats['inserted'],
                 'items_with_bids': scraper.stats['with_bids'],
                 'duplicates_removed': stats.get('duplicates_removed', 0),
-            })
+            }
+            if json_error is None:
+                supabase.heartbeat_success(final_stats=final_stats)
+            else:
+                final_stats['json_error'] = str(json_error)[:500]
+                supabase.heartbeat_finish(status='warning', final_stats=final_stats)
     
     except Exception as e:
         print(f"⚠️ Erro crítico: {e}")
@@ -966,14 +1289,16 @@ async def main():
         print("\n" + "="*70)
         print("📊 ESTATÍSTICAS FINAIS")
         print("="*70)
-        print(f"🟣 Sodré Santoro:")
-        print(f"  • Total coletado (API): {scraper.stats['total_scraped']}")
-        print(f"  • Com lances: {scraper.stats['with_bids']}")
-        print(f"  • Filtrados (status inválido): {scraper.stats['filtered_invalid_status']}")
-        print(f"  • 🔥 Filtrados (validação de link): {scraper.stats['filtered_by_link_validation']}")
-        if 'validated_items' in locals():
-            print(f"  • ✅ TOTAL VÁLIDO (salvos): {len(validated_items)}")
-        print(f"  • Erros: {scraper.stats['errors']}")
+        # ✅ scraper pode não existir se a falha foi antes da coleta (ex.: SupabaseClient)
+        if scraper is not None:
+            print(f"🟣 Sodré Santoro:")
+            print(f"  • Total coletado (API): {scraper.stats['total_scraped']}")
+            print(f"  • Com lances: {scraper.stats['with_bids']}")
+            print(f"  • Filtrados (status inválido): {scraper.stats['filtered_invalid_status']}")
+            print(f"  • 🔥 Filtrados (validação de link): {scraper.stats['filtered_by_link_validation']}")
+            if 'validated_items' in locals():
+                print(f"  • ✅ TOTAL VÁLIDO (salvos): {len(validated_items)}")
+            print(f"  • Erros: {scraper.stats['errors']}")
         print(f"\n⏱️ Duração: {minutes}min {seconds}s")
         print(f"✅ Concluído: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
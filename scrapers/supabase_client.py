@@ -4,13 +4,15 @@
 SUPABASE CLIENT - VERSÃO CORRIGIDA (SODRÉ)
 ✅ Heartbeat corrigido: envia como array + on_conflict
 ✅ Normaliza chaves antes de enviar (fix PGRST102)
-✅ Remove duplicatas DENTRO do batch (fix PGRST21000)
+✅ Remove duplicatas antes de dividir em batches (fix PGRST21000)
 ✅ Todos os items no batch têm as mesmas chaves
 """
 
 import os
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict, Optional
 
@@ -38,6 +40,22 @@ class SupabaseClient:
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         
+        # ✅ Um único host: pool keep-alive dimensionado para as threads do upsert
+        # (+ heartbeat na thread principal) sem descartar conexões
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # ✅ Linhas por POST no upsert (ajustável via SUPABASE_BATCH_SIZE;
+        # vazio = padrão, valor inválido = padrão com aviso)
+        self.batch_size = 500
+        batch_size_env = os.getenv('SUPABASE_BATCH_SIZE', '').strip()
+        if batch_size_env:
+            try:
+                self.batch_size = max(1, int(batch_size_env))
+            except ValueError:
+                print(f"  ⚠️ SUPABASE_BATCH_SIZE inválido ({batch_size_env!r}): usando {self.batch_size}")
+        
         # Heartbeat
         self.service_name = service_name
         self.service_type = service_type
@@ -231,32 +249,31 @@ class SupabaseClient:
     # NORMALIZAÇÃO E DEDUPLICAÇÃO
     # ========================================================================
     
-    def _deduplicate_batch(self, items: List[Dict]) -> tuple[List[Dict], int]:
+    def _deduplicate_items(self, items: List[Dict]) -> tuple[List[Dict], int]:
         """
-        Remove duplicatas DENTRO do batch baseado em external_id
+        Remove duplicatas baseado em external_id (mantém a 1ª ocorrência)
         ✅ Resolve PGRST21000: "cannot affect row a second time"
+        ✅ Roda UMA vez na lista inteira: nenhum batch recebe duplicatas
         
         Retorna: (items_únicos, quantidade_duplicatas)
         """
         if not items:
             return items, 0
         
-        seen = {}
-        unique_items = []
+        unique_by_id = {}
         duplicates = 0
         
         for item in items:
             external_id = item.get('external_id')
             if not external_id:
                 continue
-                
-            if external_id not in seen:
-                seen[external_id] = True
-                unique_items.append(item)
+            
+            if external_id not in unique_by_id:
+                unique_by_id[external_id] = item
             else:
                 duplicates += 1
         
-        return unique_items, duplicates
+        return list(unique_by_id.values()), duplicates
     
     def _normalize_batch_keys(self, items: List[Dict]) -> List[Dict]:
         """
@@ -285,23 +302,28 @@ class SupabaseClient:
     # UPSERT CORRIGIDO
     # ========================================================================
     
-    def upsert(self, tabela: str, items: List[Dict]) -> Dict:
+    def upsert(self, tabela: str, items: List[Dict], max_workers: int = 4, batch_size: Optional[int] = None) -> Dict:
         """
         Upsert com deduplicação e normalização de chaves
-        ✅ Fix PGRST21000: Remove duplicatas dentro do batch
+        ✅ Fix PGRST21000: Remove duplicatas (uma vez, antes dos batches)
         ✅ Fix PGRST102: Normaliza chaves antes de enviar
+        ✅ Batches de batch_size (padrão: self.batch_size) enviados em paralelo (até max_workers requisições)
         """
         if not items:
             return {'inserted': 0, 'updated': 0, 'errors': 0, 'total': 0, 'duplicates_removed': 0}
         
-        # Prepara timestamps
+        # Prepara timestamps (em cópias: a lista do chamador pode estar sendo
+        # serializada em paralelo, ex.: JSON do scraper gravado em thread)
         now = datetime.now().isoformat()
+        prepared = []
         for item in items:
+            item = dict(item)
             item['last_scraped_at'] = now
-            if 'updated_at' not in item or not item['updated_at']:
+            if not item.get('updated_at'):
                 item['updated_at'] = now
-            if 'created_at' in item:
-                del item['created_at']
+            item.pop('created_at', None)
+            prepared.append(item)
+        items = prepared
         
         stats = {
             'inserted': 0, 
@@ -311,8 +333,19 @@ class SupabaseClient:
             'duplicates_removed': 0
         }
         
-        batch_size = 500
-        total_batches = (len(items) + batch_size - 1) // batch_size
+        # ✅ REMOVE DUPLICATAS (lista inteira, antes de dividir em batches)
+        items, duplicates = self._deduplicate_items(items)
+        if duplicates > 0:
+            stats['duplicates_removed'] = duplicates
+            print(f"  🔄 {duplicates} duplicatas removidas")
+        
+        if not items:
+            print("  ⚠️ Nenhum item válido após deduplicação")
+            return stats
+        
+        batch_size = batch_size or self.batch_size
+        batches = [items[i:i+batch_size] for i in range(0, len(items), batch_size)]
+        total_batches = len(batches)
         
         url = f"{self.url}/rest/v1/{tabela}?on_conflict=external_id"
         
@@ -321,72 +354,90 @@ class SupabaseClient:
             'Prefer': 'resolution=merge-duplicates,return=representation'
         }
         
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
+        # 🔥 Envia batches em paralelo; agregação/logs/heartbeat ficam na thread principal
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_batches))) as executor:
+            futures = {
+                executor.submit(self._upsert_batch, url, upsert_headers, batch): batch_num
+                for batch_num, batch in enumerate(batches, start=1)
+            }
             
-            try:
-                # ✅ REMOVE DUPLICATAS DO BATCH
-                batch_unique, batch_dupes = self._deduplicate_batch(batch)
-                
-                if batch_dupes > 0:
-                    stats['duplicates_removed'] += batch_dupes
-                    print(f"  🔄 Batch {batch_num}/{total_batches}: {batch_dupes} duplicatas removidas")
-                
-                if not batch_unique:
-                    print(f"  ⚠️ Batch {batch_num}/{total_batches}: vazio após deduplicação")
-                    continue
-                
-                # ✅ NORMALIZA CHAVES DO BATCH
-                normalized_batch = self._normalize_batch_keys(batch_unique)
+            for future in as_completed(futures):
+                batch_num = futures[future]
+                result = future.result()
                 
-                # Envia batch normalizado e deduplicado
-                r = self.session.post(
-                    url,
-                    json=normalized_batch,
-                    headers=upsert_headers,
-                    timeout=120
-                )
-                
-                if r.status_code in (200, 201):
-                    try:
-                        response_data = r.json()
-                        if isinstance(response_data, list):
-                            stats['inserted'] += len(response_data)
-                            self.heartbeat_metrics['items_inserted'] += len(response_data)
-                        else:
-                            stats['inserted'] += len(batch_unique)
-                            self.heartbeat_metrics['items_inserted'] += len(batch_unique)
-                    except:
-                        stats['inserted'] += len(batch_unique)
-                        self.heartbeat_metrics['items_inserted'] += len(batch_unique)
+                if result['status'] == 'ok':
+                    stats['inserted'] += result['inserted']
+                    self.heartbeat_metrics['items_inserted'] += result['inserted']
                     
-                    print(f"  ✅ Batch {batch_num}/{total_batches}: {len(batch_unique)} itens processados")
+                    print(f"  ✅ Batch {batch_num}/{total_batches}: {result['sent']} itens processados")
                     
                     self.heartbeat_progress(
-                        items_processed=len(batch_unique),
+                        items_processed=result['sent'],
                         custom_logs={'batch': batch_num, 'total_batches': total_batches}
                     )
                 
+                elif result['status'] == 'http_error':
+                    print(f"  ❌ Batch {batch_num}/{total_batches}: HTTP {result['http_status']}")
+                    print(f"     Erro: {result['message']}")
+                    stats['errors'] += result['errors']
+                    self.heartbeat_metrics['errors'] += result['errors']
+                
+                elif result['status'] == 'timeout':
+                    print(f"  ⏱️ Batch {batch_num}/{total_batches}: Timeout (120s)")
+                    stats['errors'] += result['errors']
+                
                 else:
-                    error_msg = r.text[:300] if r.text else 'Sem detalhes'
-                    print(f"  ❌ Batch {batch_num}/{total_batches}: HTTP {r.status_code}")
-                    print(f"     Erro: {error_msg}")
-                    stats['errors'] += len(batch_unique)
-                    self.heartbeat_metrics['errors'] += len(batch_unique)
+                    print(f"  ❌ Batch {batch_num}/{total_batches}: {result['message']}")
+                    stats['errors'] += result['errors']
+        
+        return stats
+    
+    def _upsert_batch(self, url: str, headers: Dict, batch: List[Dict]) -> Dict:
+        """
+        Envia UM batch (roda em thread do pool)
+        Não mexe em stats/heartbeat: só retorna o resultado para agregação
+        """
+        result = {'status': 'ok', 'sent': 0, 'inserted': 0, 'errors': 0}
+        
+        try:
+            # ✅ NORMALIZA CHAVES DO BATCH (já deduplicado em upsert)
+            normalized_batch = self._normalize_batch_keys(batch)
+            result['sent'] = len(batch)
             
-            except requests.exceptions.Timeout:
-                print(f"  ⏱️ Batch {batch_num}/{total_batches}: Timeout (120s)")
-                stats['errors'] += len(batch)
+            # Envia batch normalizado e deduplicado
+            r = self.session.post(
+                url,
+                json=normalized_batch,
+                headers=headers,
+                timeout=120
+            )
             
-            except Exception as e:
-                print(f"  ❌ Batch {batch_num}/{total_batches}: {type(e).__name__}: {str(e)[:200]}")
-                stats['errors'] += len(batch)
+            if r.status_code in (200, 201):
+                try:
+                    response_data = r.json()
+                    if isinstance(response_data, list):
+                        result['inserted'] = len(response_data)
+                    else:
+                        result['inserted'] = len(batch)
+                except:
+                    result['inserted'] = len(batch)
             
-            if batch_num < total_batches:
-                time.sleep(0.5)
+            else:
+                result['status'] = 'http_error'
+                result['http_status'] = r.status_code
+                result['message'] = r.text[:300] if r.text else 'Sem detalhes'
+                result['errors'] = len(batch)
         
-        return stats
+        except requests.exceptions.Timeout:
+            result['status'] = 'timeout'
+            result['errors'] = len(batch)
+        
+        except Exception as e:
+            result['status'] = 'exception'
+            result['message'] = f"{type(e).__name__}: {str(e)[:200]}"
+            result['errors'] = len(batch)
+        
+        return result
     
     # ========================================================================
     # MÉTODOS AUXILIARES